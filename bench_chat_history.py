@@ -0,0 +1,58 @@
+"""Benchmark Vacation Assistant rerun time against chat history length.
+
+Runs the app headlessly with Streamlit's AppTest, seeds the chat history and
+times a rerun with the default message window and with the full history shown.
+No API calls are made, so placeholder keys are enough:
+
+    python bench_chat_history.py > bench_output.txt
+"""
+import os
+import time
+
+os.environ.setdefault('OPENAI_API_KEY', 'bench')
+os.environ.setdefault('SERP_API_KEY', 'bench')
+
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vacation_finder_planner.py')
+HISTORY_LENGTHS = [10, 50, 100, 250, 500]
+RUNS = 5
+
+ASSISTANT_REPLY = (
+    "Here are a few ideas:\n\n"
+    "- **Louvre Museum**: book ahead at [louvre.fr](https://www.louvre.fr)\n"
+    "- **Le Marais**: great for a walk and falafel\n\n"
+    "The drive from Paris to Versailles is about 20 km (30 minutes)."
+)
+
+
+def make_history(length):
+    history = []
+    for i in range(length):
+        if i % 2 == 0:
+            history.append({'role': 'user', 'content': f"What should I see on day {i // 2 + 1}?"})
+        else:
+            history.append({'role': 'assistant', 'content': ASSISTANT_REPLY})
+    return history
+
+
+def time_rerun(length, show_all):
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.session_state['vacation_chat_history'] = make_history(length)
+    if show_all:
+        at.session_state['vacation_chat_visible'] = length
+    at.run()  # warm up imports and caches
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+if __name__ == '__main__':
+    print(f"{'messages':>8}  {'windowed (ms)':>14}  {'full history (ms)':>18}")
+    for length in HISTORY_LENGTHS:
+        windowed = time_rerun(length, show_all=False)
+        full = time_rerun(length, show_all=True)
+        print(f"{length:>8}  {windowed * 1000:>14.1f}  {full * 1000:>18.1f}")
@@ -0,0 +1,86 @@
+import re
+
+# Day headings are either a markdown heading ("## Day 3: Louvre") or a line led by bold text
+# ("**Day 3:** Louvre"); plain lines like "Day 3 evening: ..." are ordinary content
+DAY_HEADING_RE = re.compile(
+    r'^[ \t]*(?:(#{1,6})[ \t]+(?:\*\*)?[ \t]*Day[ \t]+(\d+)\b.*|\*\*[ \t]*Day[ \t]+(\d+)\b[^*\n]*\*\*.*)$',
+    re.IGNORECASE | re.MULTILINE
+)
+# A markdown heading or a horizontal rule
+SECTION_BREAK_RE = re.compile(r'^[ \t]*(?:(#{1,6})[ \t]+\S.*|(?:-{3,}|\*{3,}|_{3,})[ \t]*)$', re.MULTILINE)
+# Lines that belong to a day: indented text, list items, "**Dinner:** ..." labels or sub-headings
+DAY_CONTENT_RE = re.compile(r'^(?:[ \t]+\S|[-*+][ \t]|\d+[.)][ \t]|\*\*[^*\n]+\*\*|#)', re.MULTILINE)
+PARAGRAPH_BREAK_RE = re.compile(r'\n(?:[ \t]*\n)+')
+TRIP_NOUNS = r'(?:road trip|trip|itinerary|vacation|holiday|getaway|adventure|journey|tour|plan|stay)'
+
+
+def find_outro_start(itinerary, day_start, end):
+    # Closing notes such as "Enjoy your 3 days in Paris!" are the trailing plain paragraphs of
+    # the last day, as long as the day itself has list items or labels to tell them apart
+    section = itinerary[day_start:end]
+    starts = [m.end() for m in PARAGRAPH_BREAK_RE.finditer(section)]
+    outro_start = None
+    for start in reversed(starts):
+        if DAY_CONTENT_RE.match(section, start):
+            break
+        outro_start = start
+    if outro_start is None:
+        return end
+    day_body = section[:outro_start].split('\n', 1)[1] if '\n' in section[:outro_start] else ''
+    if not DAY_CONTENT_RE.search(day_body):
+        return end
+    return day_start + outro_start
+
+
+def split_itinerary_days(itinerary):
+    # Split a markdown itinerary into intro text, a {day number: section} dict and closing text
+    matches = list(DAY_HEADING_RE.finditer(itinerary))
+    if not matches:
+        return itinerary, {}, ''
+    intro = itinerary[:matches[0].start()]
+
+    # The last day ends at the first heading that is not nested under it or a horizontal rule,
+    # and any plain closing paragraphs right before that point go with the closing text too
+    last = matches[-1]
+    day_level = len(last.group(1)) if last.group(1) else 0
+    end = len(itinerary)
+    for brk in SECTION_BREAK_RE.finditer(itinerary, last.end()):
+        if not brk.group(1) or not day_level or len(brk.group(1)) <= day_level:
+            end = brk.start()
+            break
+    end = find_outro_start(itinerary, last.start(), end)
+    outro = itinerary[end:]
+
+    sections = {}
+    for i, match in enumerate(matches):
+        section_end = matches[i + 1].start() if i + 1 < len(matches) else end
+        day = int(match.group(2) or match.group(3))
+        text = itinerary[match.start():section_end].strip()
+        # A repeated heading for the same day continues that day rather than replacing it
+        sections[day] = f"{sections[day]}\n\n{text}" if day in sections else text
+    return intro, sections, outro
+
+
+def join_itinerary_days(intro, sections, outro=''):
+    parts = [intro.strip()] if intro.strip() else []
+    parts.extend(sections[day] for day in sorted(sections))
+    if outro.strip():
+        parts.append(outro.strip())
+    return "\n\n".join(parts)
+
+
+def update_day_count(text, previous_days, days):
+    # Only trip-length phrases are rewritten: "3-day trip", "your 3 days" and "3 days in Paris".
+    # Others like "within 2 days of booking" are left alone.
+    def replace_days(match):
+        word = match.group(1) or match.group(2)
+        singular = word[:-1] if word[-1] in 'sS' else word
+        return f"{days} {singular if days == 1 else singular + 's'}"
+
+    text = re.sub(rf'\b{previous_days}(?=[- ]day[ \t]+{TRIP_NOUNS}\b)', str(days), text, flags=re.IGNORECASE)
+    return re.sub(
+        rf'(?<=\byour ){previous_days}[ \t]+(days?)\b|\b{previous_days}[ \t]+(days?)\b(?=[ \t]+in\b(?![ \t]+advance))',
+        replace_days,
+        text,
+        flags=re.IGNORECASE
+    )
@@ -0,0 +1,73 @@
+from itinerary_sections import join_itinerary_days, split_itinerary_days, update_day_count
+
+PLAN = (
+    "Here's your 3-day trip to Paris!\n\n"
+    "### Day 1: Louvre\n- museum\n\n"
+    "### Day 2: Montmartre\n- Sacre-Coeur\n\n"
+    "### Day 3: Marais\n- walk\n\n"
+    "Enjoy your 3 days in Paris!"
+)
+
+
+def test_trailing_paragraph_is_outro():
+    intro, sections, outro = split_itinerary_days(PLAN)
+    assert intro.strip() == "Here's your 3-day trip to Paris!"
+    assert sections[3] == "### Day 3: Marais\n- walk"
+    assert outro == "Enjoy your 3 days in Paris!"
+
+
+def test_heading_after_last_day_starts_outro():
+    plan = "## Day 1\n- a\n### Evening\n- b\n\n## Additional Tips\n- water\n\nEnjoy your trip!"
+    _, sections, outro = split_itinerary_days(plan)
+    assert sections == {1: "## Day 1\n- a\n### Evening\n- b"}
+    assert outro == "## Additional Tips\n- water\n\nEnjoy your trip!"
+
+
+def test_plain_paragraph_between_lists_stays_in_day():
+    plan = "## Day 1\n- a\n\nTake the metro.\n\n- b"
+    _, sections, outro = split_itinerary_days(plan)
+    assert sections[1] == plan
+    assert outro == ''
+
+
+def test_prose_only_last_day_is_not_split():
+    plan = "**Day 1: Paris**\nMorning walk.\n\nDinner by the Seine."
+    _, sections, outro = split_itinerary_days(plan)
+    assert sections[1] == plan
+    assert outro == ''
+
+
+def test_only_heading_lines_start_days():
+    plan = "**Day 1:** Paris\nDay 1 evening: Seine cruise\nDay 2 morning: x\n**Day 2**: y"
+    _, sections, _ = split_itinerary_days(plan)
+    assert sections == {
+        1: "**Day 1:** Paris\nDay 1 evening: Seine cruise\nDay 2 morning: x",
+        2: "**Day 2**: y",
+    }
+
+
+def test_repeated_day_heading_is_appended():
+    _, sections, _ = split_itinerary_days("## Day 1\n- a\n\n## Day 1\n- b")
+    assert sections == {1: "## Day 1\n- a\n\n## Day 1\n- b"}
+
+
+def test_shorten_and_extend_keep_outro_last():
+    intro, sections, outro = split_itinerary_days(PLAN)
+    shorter = join_itinerary_days(intro, {day: text for day, text in sections.items() if day <= 2}, outro)
+    assert "Day 3" not in shorter
+    assert shorter.endswith("Enjoy your 3 days in Paris!")
+    longer = join_itinerary_days(intro, {**sections, 4: "### Day 4: Versailles\n- palace"}, outro)
+    assert longer.index("Day 4") < longer.index("Enjoy")
+
+
+def test_update_day_count_only_changes_trip_length():
+    assert update_day_count(PLAN, 3, 5).endswith("Enjoy your 5 days in Paris!")
+    assert update_day_count("Here's your 3-day trip", 3, 5) == "Here's your 5-day trip"
+    assert update_day_count("Cancel within 2 days of booking.", 2, 1) == "Cancel within 2 days of booking."
+    assert update_day_count("Book 2 days in advance.", 2, 4) == "Book 2 days in advance."
+
+
+def test_update_day_count_pluralization():
+    assert update_day_count("Enjoy your 2 days in Rome!", 2, 1) == "Enjoy your 1 day in Rome!"
+    assert update_day_count("Make the most of 1 day in Rome.", 1, 3) == "Make the most of 3 days in Rome."
+    assert update_day_count("A 1-day plan", 1, 3) == "A 3-day plan"
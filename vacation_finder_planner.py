@@ -4,6 +4,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 import streamlit as st
 import openai
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from fpdf import FPDF
 import io
@@ -17,6 +19,7 @@ from docx.oxml import OxmlElement
 import markdown2
 from bs4 import BeautifulSoup
 from PIL import Image
+from itinerary_sections import split_itinerary_days, join_itinerary_days, update_day_count
 
 # Set page config with custom icon
 icon_path = os.path.join(os.path.dirname(__file__), 'DigitaL_Planner_App.png')
@@ -138,27 +141,110 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-def search_travel_deals(start, dest, start_date, days, preferences):
-    query = f"best travel deals {start} to {dest or 'anywhere'} {start_date} {days} days {preferences}"
+# Deal groups searched for each trip, in the order they are shown to the user
+DEAL_CATEGORIES = {
+    "deals": "Travel Deals",
+    "hotels": "Hotels",
+    "restaurants": "Restaurants",
+    "activities": "Attractions & Activities",
+}
+
+# Changing any of these invalidates the previous search, so the plan is rebuilt from scratch
+SEARCH_FIELDS = ('start', 'dest', 'start_date')
+# Deal groups whose queries use each field, searched again when it changes in a delta re-plan
+DELTA_SEARCH_CATEGORIES = {
+    'days': ('deals',),
+    'preferences': ('deals', 'activities'),
+    'restaurant_prefs': ('restaurants',),
+}
+
+# Concurrent searches the shared SerpAPI pool keeps connections for, across all users
+SERPAPI_POOL_SIZE = len(DEAL_CATEGORIES) * 8
+
+@st.cache_resource
+def get_serpapi_adapter():
+    # The connection pool is shared across reruns and users so category searches reuse
+    # connections to SerpAPI. urllib3 pools are thread-safe, unlike requests.Session,
+    # whose cookie jar would also leak between users, so only the adapter is cached.
+    return HTTPAdapter(pool_connections=1, pool_maxsize=SERPAPI_POOL_SIZE)
+
+def serpapi_search(adapter, query, num=5):
     params = {
         "q": query,
         "api_key": SERP_API_KEY,
-        "num": 5,
+        "num": num,
         "engine": "google",
         "hl": "en"
     }
-    resp = requests.get(SERPAPI_SEARCH_URL, params=params)
-    results = resp.json().get("organic_results", [])
+    # A fresh session per search; it is not closed since that would close the shared adapter
+    session = requests.Session()
+    session.mount("https://", adapter)
+    try:
+        resp = session.get(SERPAPI_SEARCH_URL, params=params, timeout=20)
+        return resp.json().get("organic_results", [])
+    except (requests.RequestException, ValueError):
+        # A failed group should not wipe out the results of the others
+        return []
+
+def search_travel_deals(start, dest, start_date, days, preferences, restaurant_preferences="", categories=None):
+    queries = {
+        "deals": f"best travel deals {start} to {dest or 'anywhere'} {start_date} {days} days {preferences}"
+    }
+    # Targeted searches only make sense once we know where the trip is going
+    if dest:
+        cuisine = restaurant_preferences.strip() if restaurant_preferences else ""
+        queries["hotels"] = f"best hotels in {dest} around $200 per night free breakfast good reviews"
+        queries["restaurants"] = f"best {cuisine or 'Indian Thai Mexican'} restaurants in {dest} good reviews"
+        queries["activities"] = f"top attractions things to do in {dest} {preferences}"
+    # Allow refreshing just some groups, e.g. restaurants after a cuisine change
+    if categories is not None:
+        queries = {category: query for category, query in queries.items() if category in categories}
+    if not queries:
+        return []
+
+    # Fetched on the script thread, cached functions need the Streamlit script context
+    adapter = get_serpapi_adapter()
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = {category: executor.submit(serpapi_search, adapter, query) for category, query in queries.items()}
+
+    # Flatten into one list tagged by category so exports keep working on plain deal dicts
+    results = []
+    for category in DEAL_CATEGORIES:
+        if category in futures:
+            for d in futures[category].result():
+                results.append({**d, "category": category})
     return results
 
-def generate_itinerary(dest, start_date, days, preferences, deals, restaurant_preferences=""):
-    context = "\n".join([f"{d['title']}: {d.get('snippet', '')} ({d.get('link', '')})" for d in deals])
-    
+def group_deals(deals):
+    groups = {}
+    for d in deals:
+        groups.setdefault(d.get('category', 'deals'), []).append(d)
+    # Known groups first in display order, then any unknown ones so no deal is dropped
+    order = [category for category in DEAL_CATEGORIES if category in groups]
+    order += [category for category in groups if category not in DEAL_CATEGORIES]
+    return [(DEAL_CATEGORIES.get(category, category), groups[category]) for category in order]
+
+def merge_deals(previous_deals, fresh_deals, categories):
+    # Replace only the refreshed groups and keep the rest of the previous search
+    # Replacement order doesn't matter, group_deals decides the display order
+    kept = [d for d in previous_deals if d.get('category', 'deals') not in categories]
+    return kept + fresh_deals
+
+def format_deals_context(deals):
+    return "\n\n".join(
+        f"{label}:\n" + "\n".join(f"- {d['title']}: {d.get('snippet', '')} ({d.get('link', '')})" for d in group)
+        for label, group in group_deals(deals)
+    )
+
+def restaurant_instruction(restaurant_preferences):
     # Set restaurant recommendation text based on user input
     if restaurant_preferences and restaurant_preferences.strip():
-        restaurant_text = f"Recommend good {restaurant_preferences.strip()} restaurants with good reviews along the way."
-    else:
-        restaurant_text = "By default, recommend good Indian, Thai, or Mexican restaurants with good reviews along the way."
+        return f"Recommend good {restaurant_preferences.strip()} restaurants with good reviews along the way."
+    return "By default, recommend good Indian, Thai, or Mexican restaurants with good reviews along the way."
+
+def generate_itinerary(dest, start_date, days, preferences, deals, restaurant_preferences=""):
+    context = format_deals_context(deals)
+    restaurant_text = restaurant_instruction(restaurant_preferences)
     
     prompt = (
         f"Plan a detailed {days}-day vacation in {dest} starting on {start_date}. "
@@ -170,6 +256,7 @@ def generate_itinerary(dest, start_date, days, preferences, deals, restaurant_pr
         f"For each restaurant, provide a link to book or view the menu if possible. "
         f"Give a detailed, clear itinerary with places to see, what to do, and explanations for each. "
         f"Consider these preferences: {preferences}. "
+        f"Prefer the hotels, restaurants and attractions found below and link to them instead of inventing new ones. "
         f"Use the following deals and links if relevant:\n{context}\n\n"
         f"Format as a day-by-day itinerary with links for booking."
     )
@@ -181,6 +268,61 @@ def generate_itinerary(dest, start_date, days, preferences, deals, restaurant_pr
     )
     return response.choices[0].message.content.strip()
 
+def revise_itinerary(itinerary, dest, start_date, days, preferences, deals, restaurant_preferences, changed, previous_days):
+    # Only the day sections affected by the changed fields are regenerated and merged back.
+    # Returns None when the plan can't be split into days or the model's answer is cut off or
+    # incomplete, so the caller falls back to a full generate_itinerary.
+    intro, sections, outro = split_itinerary_days(itinerary)
+    if not sections:
+        return None
+    sections = {day: text for day, text in sections.items() if day <= days}
+    if days != previous_days:
+        intro = update_day_count(intro, previous_days, days)
+        outro = update_day_count(outro, previous_days, days)
+
+    instructions = []
+    if 'restaurant_prefs' in changed:
+        instructions.append(f"Swap the restaurants for new ones. {restaurant_instruction(restaurant_preferences)} For each restaurant, provide a link to book or view the menu if possible.")
+    if 'preferences' in changed:
+        instructions.append(f"Adjust the activities to these updated preferences: {preferences}.")
+    if days > previous_days:
+        instructions.append(
+            f"Extend the trip from {previous_days} to {days} days by adding Day {previous_days + 1} to Day {days}, "
+            f"continuing the route from the last day. Include daily activities, must-see places, and where to eat. "
+            f"{restaurant_instruction(restaurant_preferences)} "
+            f"For each night, recommend hotels with a price range around $200/night, with very good reviews and free breakfast, and provide links to book them if possible. "
+            f"For each restaurant, provide a link to book or view the menu if possible. "
+            f"Consider these preferences: {preferences}."
+        )
+    if not instructions:
+        # Only the trip got shorter, dropping the extra days is enough
+        return join_itinerary_days(intro, sections, outro)
+
+    prompt = (
+        f"Here is an existing {min(days, previous_days)}-day itinerary for a vacation in {dest} starting on {start_date}:\n\n"
+        f"{join_itinerary_days('', sections)}\n\n"
+        f"Revise it as follows: {' '.join(instructions)} "
+        f"Keep everything else the same. "
+        f"Return ONLY the day sections that change or are new, each starting with its heading in the same format (e.g. \"Day 2\"). "
+        f"Do not repeat unchanged days or add any introduction or closing notes.\n\n"
+        f"Use the following deals and links if relevant:\n{format_deals_context(deals)}"
+    )
+    response = openai.OpenAI(api_key=OPENAI_API_KEY).chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=1500,
+        temperature=0.7
+    )
+    choice = response.choices[0]
+    if choice.finish_reason == 'length':
+        # A reply cut off at the token limit would leave a half-written last day
+        return None
+    _, revised, _ = split_itinerary_days(choice.message.content.strip())
+    if not revised or not set(range(previous_days + 1, days + 1)) <= revised.keys():
+        return None
+    sections.update({day: text for day, text in revised.items() if day <= days})
+    return join_itinerary_days(intro, sections, outro)
+
 def clean_and_fit_line(pdf, line, cell_width):
     # Only printable ASCII chars that fit in the cell
     safe_chars = []
@@ -269,32 +411,34 @@ def export_docx(itinerary_md, deals):
     doc.add_heading('Itinerary', level=1)
     doc = markdown_to_docx(itinerary_md, doc)
     doc.add_heading('Top Deals & Booking Links', level=1)
-    for d in deals:
-        title = d.get('title', '')
-        link = d.get('link', '')
-        para = doc.add_paragraph(style='List Bullet')
-        if link and link.startswith('http'):
-            run = para.add_run(title + ': ')
-            part = doc.part
-            r_id = part.relate_to(link, 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink', is_external=True)
-            hyperlink = OxmlElement('w:hyperlink')
-            hyperlink.set(qn('r:id'), r_id)
-            new_run = OxmlElement('w:r')
-            rPr = OxmlElement('w:rPr')
-            color = OxmlElement('w:color')
-            color.set(qn('w:val'), '0000FF')
-            rPr.append(color)
-            u = OxmlElement('w:u')
-            u.set(qn('w:val'), 'single')
-            rPr.append(u)
-            new_run.append(rPr)
-            t = OxmlElement('w:t')
-            t.text = link
-            new_run.append(t)
-            hyperlink.append(new_run)
-            para._p.append(hyperlink)
-        else:
-            para.add_run(f"{title}: {link}")
+    for label, group in group_deals(deals):
+        doc.add_heading(label, level=2)
+        for d in group:
+            title = d.get('title', '')
+            link = d.get('link', '')
+            para = doc.add_paragraph(style='List Bullet')
+            if link and link.startswith('http'):
+                run = para.add_run(title + ': ')
+                part = doc.part
+                r_id = part.relate_to(link, 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink', is_external=True)
+                hyperlink = OxmlElement('w:hyperlink')
+                hyperlink.set(qn('r:id'), r_id)
+                new_run = OxmlElement('w:r')
+                rPr = OxmlElement('w:rPr')
+                color = OxmlElement('w:color')
+                color.set(qn('w:val'), '0000FF')
+                rPr.append(color)
+                u = OxmlElement('w:u')
+                u.set(qn('w:val'), 'single')
+                rPr.append(u)
+                new_run.append(rPr)
+                t = OxmlElement('w:t')
+                t.text = link
+                new_run.append(t)
+                hyperlink.append(new_run)
+                para._p.append(hyperlink)
+            else:
+                para.add_run(f"{title}: {link}")
     for p in doc.paragraphs:
         p.paragraph_format.space_after = Pt(6)
     output = BytesIO()
@@ -302,6 +446,17 @@ def export_docx(itinerary_md, deals):
     output.seek(0)
     return output
 
+# Number of most recent chat messages rendered on each rerun; older ones load on demand
+CHAT_HISTORY_WINDOW = 10
+
+@st.cache_data(max_entries=500, show_spinner=False)
+def render_chat_message(role, content):
+    # Markdown to HTML conversion is cached so old messages are not re-converted on every rerun
+    body = markdown2.markdown(content).strip()
+    if role == 'user':
+        return f"<div style='margin-bottom:6px;'><b>You:</b> {body}</div>"
+    return f"<div style='margin-bottom:12px; color:#fff;'><b>Assistant:</b> {body}</div>"
+
 # --- Tabbed layout ---
 tabs = st.tabs(["Vacation Finder & Planner", "Vacation Assistant"])
 
@@ -320,6 +475,8 @@ with tabs[0]:
         restaurant_prefs = st.text_input("Restaurant Preferences (e.g., Italian, French, Asian, etc.):", 
                                          value=st.session_state.get('restaurant_prefs', ''),
                                          help="By default, the app will recommend good Indian, Thai, or Mexican restaurants. Enter your preferred cuisine types here to customize.")
+        quick_replan = st.checkbox("Only update the changed parts of my current plan", value=True,
+                                   help="When only days, preferences or restaurant preferences change, the current plan is revised instead of searched and planned again from scratch.")
         submitted = st.form_submit_button("Find & Plan Vacation")
 
     if submitted:
@@ -329,19 +486,44 @@ with tabs[0]:
         st.session_state['days'] = days
         st.session_state['preferences'] = preferences
         st.session_state['restaurant_prefs'] = restaurant_prefs
-        with st.spinner("Searching for deals and planning your trip..."):
-            deals = search_travel_deals(start, dest, start_date, days, preferences)
-            itinerary = generate_itinerary(dest or 'a great destination', start_date, days, preferences, deals, restaurant_prefs)
-            st.session_state['vacation_itinerary'] = itinerary
-            st.session_state['vacation_deals'] = deals
+        inputs = {
+            'start': start,
+            'dest': dest,
+            'start_date': start_date,
+            'days': days,
+            'preferences': preferences,
+            'restaurant_prefs': restaurant_prefs,
+        }
+        previous = st.session_state.get('vacation_last_inputs')
+        changed = [field for field in inputs if previous and inputs[field] != previous.get(field)]
+        itinerary = None
+        if (quick_replan and changed and 'vacation_itinerary' in st.session_state
+                and not any(field in SEARCH_FIELDS for field in changed)):
+            with st.spinner("Updating your plan..."):
+                deals = st.session_state['vacation_deals']
+                refresh = list(dict.fromkeys(category for field in changed for category in DELTA_SEARCH_CATEGORIES.get(field, ())))
+                if refresh:
+                    fresh = search_travel_deals(start, dest, start_date, days, preferences, restaurant_prefs, categories=refresh)
+                    deals = merge_deals(deals, fresh, refresh)
+                itinerary = revise_itinerary(st.session_state['vacation_itinerary'], dest or 'a great destination', start_date, days,
+                                             preferences, deals, restaurant_prefs, changed, previous['days'])
+        if itinerary is None:
+            with st.spinner("Searching for deals and planning your trip..."):
+                deals = search_travel_deals(start, dest, start_date, days, preferences, restaurant_prefs)
+                itinerary = generate_itinerary(dest or 'a great destination', start_date, days, preferences, deals, restaurant_prefs)
+        st.session_state['vacation_itinerary'] = itinerary
+        st.session_state['vacation_deals'] = deals
+        st.session_state['vacation_last_inputs'] = inputs
 
     # Display itinerary if it exists in session_state (persists across reruns)
     if 'vacation_itinerary' in st.session_state and 'vacation_deals' in st.session_state:
         st.subheader("Your Vacation Plan:")
         st.markdown(st.session_state['vacation_itinerary'])
         st.subheader("Top Deals & Booking Links:")
-        for d in st.session_state['vacation_deals']:
-            st.markdown(f"- [{d['title']}]({d.get('link', '')})")
+        for label, group in group_deals(st.session_state['vacation_deals']):
+            st.markdown(f"**{label}**")
+            for d in group:
+                st.markdown(f"- [{d['title']}]({d.get('link', '')})")
         
         # Add separator line before Buy Me a Coffee
         st.markdown("---")
@@ -386,12 +568,21 @@ with tabs[1]:
     if 'vacation_chat_history' not in st.session_state:
         st.session_state['vacation_chat_history'] = []
 
-    # Display chat history
-    for msg in st.session_state['vacation_chat_history']:
-        if msg['role'] == 'user':
-            st.markdown(f"<div style='margin-bottom:6px;'><b>You:</b> {msg['content']}</div>", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<div style='margin-bottom:12px; color:#fff;'><b>Assistant:</b> {msg['content']}</div>", unsafe_allow_html=True)
+    if 'vacation_chat_visible' not in st.session_state:
+        st.session_state['vacation_chat_visible'] = CHAT_HISTORY_WINDOW
+
+    # Display only the most recent window of the chat history, in a single markdown block
+    history = st.session_state['vacation_chat_history']
+    hidden = max(len(history) - st.session_state['vacation_chat_visible'], 0)
+    if hidden:
+        if st.button(f"Show earlier messages ({hidden} hidden)", key="vacation_chat_more_btn"):
+            st.session_state['vacation_chat_visible'] += CHAT_HISTORY_WINDOW
+            st.rerun()
+    if history:
+        st.markdown(
+            "".join(render_chat_message(msg['role'], msg['content']) for msg in history[hidden:]),
+            unsafe_allow_html=True
+        )
 
     # Chat input
     with st.form("vacation_chat_form", clear_on_submit=True):